@@ -5,7 +5,7 @@ __author__ = 'Pavel Dedik'
 __version__ = '0.1.3'
 
 
-from .decoder import parse
+from .decoder import parse, parse_stream
 from .encoder import to_string
 
 
@@ -13,11 +13,9 @@ __all__ = ('decode', 'encode')
 
 
 def decode(config):
-    try:
-        string = config.read()
-    except AttributeError:
-        string = config
-    return parse(string)
+    if hasattr(config, 'read'):
+        return parse_stream(config)
+    return parse(config)
 
 
 def encode(tree):
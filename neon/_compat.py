@@ -3,6 +3,7 @@
 
 from __future__ import unicode_literals
 
+import re
 import sys
 
 
@@ -11,5 +12,45 @@ PY3 = sys.version_info >= (3, 0)
 
 if PY3:
     unicode = str
+    intern = sys.intern
 else:
     unicode = unicode
+
+    def intern(string):
+        """Unicode strings cannot be interned in Python 2."""
+        return string
+
+
+# Since Python 3.7 plain dicts keep the insertion order and are faster
+# than OrderedDict.
+if sys.version_info >= (3, 7):
+    ordered_dict = dict
+else:
+    from collections import OrderedDict
+    ordered_dict = OrderedDict
+
+
+try:
+    from functools import lru_cache
+except ImportError:
+    def lru_cache(maxsize=128):
+        """Python 2 has no :func:`functools.lru_cache`, so nothing
+        is cached there."""
+        return lambda func: func
+
+
+# Atomic groups prevent backtracking into already matched parts of
+# a pattern. The re module supports them since Python 3.11; elsewhere
+# the regex package is used when installed, and non-capturing groups
+# otherwise.
+try:
+    re.compile(r'(?>a)')
+except re.error:
+    try:
+        import regex as re
+    except ImportError:
+        ATOMIC_GROUP = '(?:'
+    else:
+        ATOMIC_GROUP = '(?>'
+else:
+    ATOMIC_GROUP = '(?>'
@@ -3,80 +3,155 @@
 
 from __future__ import unicode_literals
 
-import re
-
 from . import errors
-from ._compat import unicode
-from .utils import lstripped, peekable
+from ._compat import re, unicode
+from .utils import peekable
 from .tokens import (
     TOKENS, NewLine, Indent, Dedent, End,
     LeftBrace, LeftSquare, LeftRound, RightBrace, RightSquare, RightRound,
 )
 
 
-#: Flags to use in the Scanner class.
+#: Flags to use in the scanner regular expression.
 SCANNER_FLAGS = re.MULTILINE | re.UNICODE | re.VERBOSE
 
 
-def _tokenize(input_string):
-    position = len(lstripped(input_string)) + 1
-    tokens, remainder = _scanner.scan(input_string.strip())
-    tokens = peekable(tokens)
+#: Number of characters read at once by :class:`tokenize_stream`.
+CHUNK_SIZE = 64 * 1024
+
+
+def _read_lines(readable, chunk_size):
+    """Reads a file-like object in chunks of whole lines.
+
+    :param readable: File-like object opened in text mode.
+    :param chunk_size: Number of characters to read at once.
+    :return: Generator of strings, each of them ends with a new line
+        except the last one.
+    """
+    # Pieces of the current line are joined only once it is complete,
+    # so long lines are not copied again for every chunk read.
+    pieces = []
+    while True:
+        data = readable.read(chunk_size)
+        if not data:
+            break
+        cut = data.rfind('\n') + 1
+        if cut:
+            pieces.append(data[:cut])
+            yield ''.join(pieces)
+            pieces = [data[cut:]]
+        else:
+            pieces.append(data)
+    rest = ''.join(pieces)
+    if rest:
+        yield rest
+
+
+def _tokenize(chunks):
+    """Scans the input using the single precompiled pattern and generates
+    the tokens, including Indent/Dedent tokens.
+
+    :param chunks: Iterable of strings to be tokenized. No token may
+        span several chunks, which holds if the chunks consist of whole
+        lines.
+    :return: Generator of tokens.
+    :raises: :class:`errors.TokenError`
+    """
+    # Globals used in the loop are bound to locals for faster lookup.
+    handlers = _HANDLERS
+    depth_change = _DEPTH_CHANGE
+    newline_group = _NEWLINE_GROUP
+    indent_group = _INDENT_GROUP
+    _NewLine = NewLine
+    _Indent = Indent
+    _Dedent = Dedent
 
+    position = 1
     curr_indent = 0
     indent_stack = [0]
-    newline_last = False
     inside_bracket = 0
+    newline_line = None
+    indent = 0
+    tok = None
 
-    while tokens:
-        indent_change = 0
-        tok = tokens.next()
-        tok.line = position
-
-        # If inside brackets, no Indent/Dedent tokens are yielded.
-        if tok.id in (LeftRound.id, LeftSquare.id, LeftBrace.id):
-            inside_bracket += 1
-        elif tok.id in (RightRound.id, RightSquare.id, RightBrace.id):
-            inside_bracket -= 1
-
-        # Determination of current indentation and indentation change
-        # is necessary for correct generation of the Indent/Dedent tokens.
-        if newline_last and not inside_bracket:
-            indent = tok.value if tok.id == Indent.id else 0
-            if indent != curr_indent:
-                indent_change = indent - curr_indent
-                curr_indent = indent
-
-        # Here we determine the position of a token in the input string.
-        if tok.id == NewLine.id:
-            newline_last = True
-            while tokens.peek().id == NewLine.id:
-                tok.value = tokens.next().value
-            position += tok.value
-        else:
-            newline_last = False
-
-        # If indentation decreased we want to generate the needed dedent
-        # tokens. These tokens are instantiated here as they cannot be
-        # matched by regular expression.
-        if indent_change < 0:
-            while indent_stack[-1] > curr_indent:
-                yield Dedent(indent_stack.pop(), line=position)
-                yield NewLine(1, line=position)
-
-        # If indentation increased we want to yield the indent token.
-        if indent_change > 0:
-            indent_stack.append(curr_indent)
-            yield tok
+    for chunk in chunks:
+        end = 0
+        for match in _TOKEN_RE.finditer(chunk):
+            start = match.start()
+            if start != end:
+                raise_gap_error(chunk, end)
+            end = match.end()
+            group = match.lastindex
 
-        # We don't want to yield any other Indent tokens as our goal is
-        # to represent the left/right braces with Indent/Dedent tokens.
-        if tok.id != Indent.id and \
-           not (inside_bracket and tok.id == NewLine.id):
+            # New lines and indentation are only recorded here, no
+            # objects are created for them. The needed tokens are
+            # generated when the next significant token is found, so
+            # that blank lines, comments and white-spaces around the
+            # input do not affect the indentation.
+            if group == newline_group:
+                if newline_line is None and tok is not None:
+                    newline_line = position
+                position += end - start
+                indent = 0
+                continue
+            if group == indent_group:
+                indent = end - start
+                continue
+
+            # White-spaces and comments have no handler.
+            handler = handlers[group - 1]
+            if handler is None:
+                continue
+            tok = handler(None, match.group())
+            tok.line = position
+
+            # If inside brackets, no NewLine/Indent/Dedent tokens
+            # are yielded.
+            if newline_line is not None:
+                if not inside_bracket:
+                    yield _NewLine(position - newline_line,
+                                   line=newline_line)
+
+                    # If indentation decreased we want to generate the
+                    # needed dedent tokens, if it increased we want to
+                    # yield an indent token. These tokens represent the
+                    # left/right braces.
+                    if indent < curr_indent:
+                        curr_indent = indent
+                        levels = 0
+                        top = indent_stack[-1]
+                        while top > curr_indent:
+                            indent_stack.pop()
+                            levels += 1
+                            top = indent_stack[-1]
+                        if levels:
+                            yield _Dedent(levels, line=position)
+                            yield _NewLine(1, line=position)
+                    elif indent > curr_indent:
+                        curr_indent = indent
+                        indent_stack.append(indent)
+                        yield _Indent(indent, line=position)
+                newline_line = None
+
+            inside_bracket += depth_change[tok.tid]
             yield tok
 
-    while len(indent_stack) > 1:
-        yield Dedent(indent_stack.pop(), line=position)
+        if end != len(chunk):
+            raise_gap_error(chunk, end)
+
+    if len(indent_stack) > 1:
+        yield Dedent(len(indent_stack) - 1, line=position)
+
+
+def raise_gap_error(input_string, position):
+    """Raises an error about a character sequence no token matched.
+
+    :param input_string: Scanned string.
+    :param position: Position of the first unmatched character.
+    :raises: :class:`errors.TokenError`
+    """
+    msg = 'Unknown character sequence: {!r}'
+    raise errors.TokenError(msg.format(input_string[position:]))
 
 
 class tokenize(peekable):
@@ -86,35 +161,69 @@ class tokenize(peekable):
     :type input_string: str
     :return: List of pairs (token type, value).
     """
+    __slots__ = ()
+
     _marker = End()
 
     def __init__(self, input_string):
-        tokens = _tokenize(unicode(input_string))
+        tokens = _tokenize([unicode(input_string)])
         super(tokenize, self).__init__(tokens)
 
-    def advance(self, allowed=None, skip=None):
-        """Helper for iterating through tokens.
+    def push_back(self, tok):
+        """Returns a token to the stream, so that it is returned by the
+        next call of ``next()``.
 
-        :param allowed: Optional list of allowed tokens. Default is
-            any token. If the found token is not allowed, the function
-            raises syntax  error.
-        :type allowed: :class:`Token` or iterable of tokens
-        :param skip: If :obj:`True`, a sequence of given token types
-            is skipped first. Default is :obj:`False`.
-        :type skip: boolean
+        :param tok: Token to return, there must be no peeked token.
+        """
+        assert self._peek is self._empty, 'A token was already peeked.'
+        self._peek = tok
+
+    def advance_in(self, expected):
+        """Returns the next token, which must be one of the expected.
+
+        :param expected: Expected tokens as created by
+            :func:`~neon.tokens.allowed`.
+        :type expected: :class:`~neon.tokens.AllowedTokens`
+        :raises: :class:`errors.ParserError`
+        """
+        tok = self.next()
+        if tok.tid not in expected.tids:
+            raise_error(expected.types, tok)
+        return tok
+
+    def expect(self, Token):
+        """Returns the next token, which must be of the given type.
+
+        :param Token: Type of the expected token.
+        :raises: :class:`errors.ParserError`
         """
         tok = self.next()
-        if skip is not None:
-            while tok.id == skip.id:
-                tok = self.next()
-        if allowed is None:
-            return tok
-        if not isinstance(allowed, (list, tuple)):
-            allowed = [allowed]
-        if all(tok.id != Token.id for Token in allowed):
-            raise_error(allowed, tok)
+        if tok.tid != Token.tid:
+            raise_error([Token], tok)
         return tok
 
+    def skip_newlines(self, _newline=NewLine.tid):
+        """Returns the next token which is not a new line."""
+        tok = self.next()
+        while tok.tid == _newline:
+            tok = self.next()
+        return tok
+
+
+class tokenize_stream(tokenize):
+    """Tokenizes the contents of a file-like object. The object is read
+    in chunks, so the whole input is never held in memory.
+
+    :param readable: File-like object opened in text mode.
+    :param chunk_size: Number of characters to read at once.
+    :type chunk_size: int
+    """
+    __slots__ = ()
+
+    def __init__(self, readable, chunk_size=CHUNK_SIZE):
+        tokens = _tokenize(_read_lines(readable, chunk_size))
+        peekable.__init__(self, tokens)
+
 
 def raise_error(expected, token):
     """Raises an error with some information about position etc.
@@ -126,7 +235,7 @@ def raise_error(expected, token):
     msg = 'Unexpected {}'.format(token.name)
     if token.line:
         msg += ' on line {}'.format(token.line)
-    if expected and token.id != Indent.id:
+    if expected and token.tid != Indent.tid:
         allowed_list = [Token.name for Token in expected if Token.re]
         if allowed_list:
             tok_msg = ' or '.join(allowed_list)
@@ -140,18 +249,55 @@ def parse(input_string):
     :param input_string: String to parse.
     :type input_string: string
     :return: Parsed string.
-    :rtype: :class:`OrderedDict`
+    :rtype: :class:`dict` or :class:`list`
     """
     tokens = tokenize(input_string)
     return Indent().parse(tokens)
 
 
-#: The Scanner is instantiated with a list of re's and associated
-#: functions. It is used to scan a string, returning a list of parts
-#: which match the given re's.
-#:
-#: See: http://stackoverflow.com/a/17214398/2874089
-_scanner = re.Scanner([
-    TokenClass.getscan() for TokenClass in TOKENS
-    if TokenClass.re is not None
-], flags=SCANNER_FLAGS)
+def parse_stream(readable, chunk_size=CHUNK_SIZE):
+    """Parses contents of a file-like object according to NEON syntax.
+
+    :param readable: File-like object opened in text mode.
+    :param chunk_size: Number of characters to read at once.
+    :type chunk_size: int
+    :return: Parsed contents.
+    :rtype: :class:`dict` or :class:`list`
+    """
+    tokens = tokenize_stream(readable, chunk_size)
+    return Indent().parse(tokens)
+
+
+#: Token classes which can be matched by the scanner, in the order of
+#: their groups in the scanner pattern.
+_SCANNED_TOKENS = [
+    TokenClass for TokenClass in TOKENS if TokenClass.re is not None
+]
+
+#: Functions creating a token from the matched string, indexed by the
+#: number of the matched group minus one. :obj:`None` means the matched
+#: string is ignored.
+_HANDLERS = [TokenClass.do for TokenClass in _SCANNED_TOKENS]
+
+#: All token patterns fused into a single alternation of named groups.
+#: The order of :data:`TOKENS` is kept, so the catch-all :class:`Unknown`
+#: token is tried last.
+_TOKEN_RE = re.compile('|'.join(
+    '(?P<{}>{})'.format(TokenClass.__name__, TokenClass.re)
+    for TokenClass in _SCANNED_TOKENS
+), SCANNER_FLAGS)
+
+#: Numbers of the scanner pattern groups matching new lines and
+#: indentation, which are handled by the tokenizer itself.
+_NEWLINE_GROUP = _SCANNED_TOKENS.index(NewLine) + 1
+_INDENT_GROUP = _SCANNED_TOKENS.index(Indent) + 1
+
+#: Changes of the depth of nesting inside brackets indexed by the token
+#: ids, so that no branching on the token type is necessary.
+_DEPTH_CHANGE = [0] * len(TOKENS)
+_DEPTH_CHANGE[LeftRound.tid] = 1
+_DEPTH_CHANGE[LeftSquare.tid] = 1
+_DEPTH_CHANGE[LeftBrace.tid] = 1
+_DEPTH_CHANGE[RightRound.tid] = -1
+_DEPTH_CHANGE[RightSquare.tid] = -1
+_DEPTH_CHANGE[RightBrace.tid] = -1
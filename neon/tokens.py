@@ -4,12 +4,14 @@
 from __future__ import unicode_literals
 
 import re
+import math
+from collections import namedtuple
 import dateutil.parser
-from collections import OrderedDict
 
 from . import errors
+from ._compat import ATOMIC_GROUP, intern, lru_cache, ordered_dict
 from .entity import Entity
-from .utils import variants, classproperty, camel_case_to_underscore
+from .utils import variants, camel_case_to_underscore
 
 
 #: List of all tokens.
@@ -19,10 +21,29 @@ TOKENS = []
 PATTERN_HEX = re.compile(r'0x[0-9a-fA-F]+')
 
 
+#: Set of ids of allowed tokens with the token types themselves,
+#: which are used in error messages.
+AllowedTokens = namedtuple('AllowedTokens', ['tids', 'types'])
+
+
+def allowed(*token_classes):
+    """Creates allowed tokens of the given types, as accepted by
+    :meth:`~neon.decoder.tokenize.advance_in`.
+
+    :rtype: :class:`AllowedTokens`
+    """
+    return AllowedTokens(
+        frozenset(Token.tid for Token in token_classes), token_classes)
+
+
 def token(cls):
     """Registers a token class.
     """
     assert issubclass(cls, Token), 'Tokens must subclass the Token class.'
+    cls.id = cls.__name__
+    cls.tid = len(TOKENS)
+    if 'name' not in vars(cls):
+        cls.name = cls.default_name()
     TOKENS.append(cls)
     return cls
 
@@ -30,15 +51,24 @@ def token(cls):
 class Token(object):
     """Token representation.
     """
+    __slots__ = ('value', 'line')
+
     #: Regular expression for tokenization.
     re = None
 
-    @classproperty
-    def id(cls):
-        return cls
+    #: Name of the token type, set when the token class is registered.
+    id = None
 
-    @classproperty
-    def name(cls):
+    #: Integer identifier of the token type, set when the token class
+    #: is registered. Used for fast comparison of token types.
+    tid = None
+
+    #: Human readable name of the token type used in error messages,
+    #: set when the token class is registered unless given explicitly.
+    name = None
+
+    @classmethod
+    def default_name(cls):
         return camel_case_to_underscore(cls.__name__).replace('_', ' ')
 
     def __init__(self, value=None, line=None):
@@ -49,7 +79,13 @@ class Token(object):
         return self.value
 
     def __eq__(self, other):
-        return type(self) == type(other) and self.value == other.value
+        return type(self) is type(other) and self.value == other.value
+
+    def __ne__(self, other):
+        return not self == other
+
+    # Tokens are mutable, so they must not be hashable.
+    __hash__ = None
 
     def __str__(self):
         name = type(self).__name__
@@ -63,18 +99,16 @@ class Token(object):
     def do(cls, scanner, string):
         return cls(string)
 
-    @classmethod
-    def getscan(cls):
-        return (cls.re, cls.do)
-
 
 class Primitive(Token):
     """Represents primitive type.
     """
+    __slots__ = ()
+
     def parse(self, tokens):
         peek = tokens.peek()
-        if peek.id == LeftRound.id:
-            attributes = tokens.advance().parse(tokens)
+        if peek.tid == LeftRound.tid:
+            attributes = tokens.next().parse(tokens)
             return Entity(self.value, attributes)
         return self.value
 
@@ -83,25 +117,24 @@ class Primitive(Token):
 class String(Primitive):
     """Represents string token.
     """
+    __slots__ = ()
+
     re = r"""
           (?: "[^"\n]*" | '[^'\n]*' )
           """
 
     @classmethod
     def do(cls, scanner, string):
-        double = '"'
-        single = "'"
-        if string[0] == double:
-            string = string.strip(double)
-        else:
-            string = string.strip(single)
-        return cls(string)
+        # The pattern guarantees the string is enclosed in quotes.
+        return cls(string[1:-1])
 
 
 @token
 class Integer(Primitive):
     """Represents integer token.
     """
+    __slots__ = ()
+
     re = None
 
     @classmethod
@@ -117,22 +150,29 @@ class Integer(Primitive):
 
 @token
 class Float(Primitive):
-    """Represents float token.
+    """Represents float token. Non-finite values such as ``inf``
+    or ``nan`` are not floats, they are parsed as strings.
     """
+    __slots__ = ()
+
     re = None
 
     @classmethod
     def convert(cls, string):
         try:
-            return float(string)
+            value = float(string)
         except ValueError:
             return
+        if not (math.isinf(value) or math.isnan(value)):
+            return value
 
 
 @token
 class Boolean(Primitive):
     """Represents boolean token.
     """
+    __slots__ = ()
+
     re = None
 
     _mapping = {
@@ -140,26 +180,35 @@ class Boolean(Primitive):
         False: variants('false', 'no', 'off'),
     }
 
+    #: Boolean values keyed by all their string alternatives.
+    _values = {
+        alternative: value
+        for value, alternatives in _mapping.items()
+        for alternative in alternatives
+    }
+
     @classmethod
     def convert(cls, string):
-        for value, alternatives in cls._mapping.items():
-            if string in alternatives:
-                return value
+        return cls._values.get(string)
 
 
 @token
 class NoneValue(Primitive):
     """Represents :obj:`None` token.
     """
+    __slots__ = ()
+
     re = None
 
-    _variants = variants('null')
+    _variants = frozenset(variants('null'))
 
 
 @token
 class DateTime(Primitive):
     """Represents datetime token.
     """
+    __slots__ = ()
+
     re = None
 
     @classmethod
@@ -174,28 +223,69 @@ class DateTime(Primitive):
 class Literal(Token):
     """Represents literal token.
     """
+    __slots__ = ()
+
     re = r"""
           (?: [^#"',:=[\]{}()\x00-\x20!`-] | [:-][^"',\]})\s] )
-          (?: [^,:=\]})(\x00-\x20]+ | :(?! [\s,\]})] | $ ) |
+          %s [^,:=\]})(\x00-\x20]+ | :(?! [\s,\]})] | $ ) |
               [\ \t]+ [^#,:=\]})(\x00-\x20] )*
-          """
+          """ % ATOMIC_GROUP
+
+    #: Characters numbers and dates can start with.
+    _number_start = frozenset('0123456789+-.')
+
+    #: Characters booleans and nulls can start with.
+    _keyword_start = frozenset(
+        string[0] for string in
+        list(Boolean._values) + list(NoneValue._variants)
+    )
 
     @classmethod
     def do(cls, scanner, string):
-        for Type in [Integer, Float, Boolean, DateTime]:
-            value = Type.convert(string)
+        Type, value = cls.convert(string)
+        if Type is DateTime:
+            value = DateTime.convert(string)
+        return Type(value)
+
+    @classmethod
+    @lru_cache(maxsize=4096)
+    def convert(cls, string):
+        """Determines the type of a literal. As literals such as keys
+        repeat a lot in documents, the results are cached.
+
+        Dates are only recognized here, their value is ``None``.
+        Incomplete dates are filled in from the current date, so their
+        values must be converted again each time.
+
+        :param string: Matched literal.
+        :return: Pair of the token type and the converted value.
+        :rtype: tuple
+        """
+        first = string[0]
+        if first in cls._number_start:
+            for Type in [Integer, Float]:
+                value = Type.convert(string)
+                if value is not None:
+                    return Type, value
+            if DateTime.convert(string) is not None:
+                return DateTime, None
+        elif first in cls._keyword_start:
+            value = Boolean.convert(string)
             if value is not None:
-                return Type(value)
-        if string in NoneValue._variants:
-            return NoneValue(None)
-        return String(string)
+                return Boolean, value
+            if string in NoneValue._variants:
+                return NoneValue, None
+        # Literal strings are mostly keys, which repeat across mappings.
+        return String, intern(string)
 
 
 class Symbol(Token):
     """Represents symbol token.
     """
-    @classproperty
-    def name(cls):
+    __slots__ = ()
+
+    @classmethod
+    def default_name(cls):
         return "'{}'".format(str(cls.re).replace('\\', ''))
 
     @classmethod
@@ -207,6 +297,8 @@ class Symbol(Token):
 class Comma(Symbol):
     """Represents comma token.
     """
+    __slots__ = ()
+
     re = r','
 
 
@@ -214,6 +306,8 @@ class Comma(Symbol):
 class Colon(Symbol):
     """Represents colon token.
     """
+    __slots__ = ()
+
     re = r':'
 
 
@@ -221,6 +315,8 @@ class Colon(Symbol):
 class EqualSign(Symbol):
     """Represents equal sign.
     """
+    __slots__ = ()
+
     re = r'='
 
 
@@ -228,6 +324,8 @@ class EqualSign(Symbol):
 class Hyphen(Symbol):
     """Represents hyphen token.
     """
+    __slots__ = ()
+
     re = r'-'
 
 
@@ -235,28 +333,30 @@ class Hyphen(Symbol):
 class LeftRound(Symbol):
     """Represents left round bracket.
     """
+    __slots__ = ()
+
     re = r'\('
 
     def parse(self, tokens):
-        data = OrderedDict()
-        tok = tokens.advance(skip=NewLine)
+        data = ordered_dict()
+        tok = tokens.skip_newlines()
         iteration = 0
 
-        while tok.id != RightRound.id:
+        while tok.tid != RightRound.tid:
             key = tok.parse(tokens)
-            tok = tokens.advance((EqualSign, Comma, RightRound))
+            tok = tokens.advance_in(_EQUAL_SIGN_COMMA_OR_RIGHT_ROUND)
 
-            if tok.id == EqualSign.id:
-                data[key] = tokens.advance().parse(tokens)
-                tok = tokens.advance((Comma, RightRound))
-                if tok.id == Comma.id:
-                    tok = tokens.advance(skip=NewLine)
+            if tok.tid == EqualSign.tid:
+                data[key] = tokens.next().parse(tokens)
+                tok = tokens.advance_in(_COMMA_OR_RIGHT_ROUND)
+                if tok.tid == Comma.tid:
+                    tok = tokens.skip_newlines()
 
-            elif tok.id == Comma.id:
+            elif tok.tid == Comma.tid:
                 data[iteration] = key
-                tok = tokens.advance(skip=NewLine)
+                tok = tokens.skip_newlines()
 
-            elif tok.id == RightRound.id:
+            elif tok.tid == RightRound.tid:
                 data[iteration] = key
 
             iteration += 1
@@ -268,6 +368,8 @@ class LeftRound(Symbol):
 class RightRound(Symbol):
     """Represents right round bracket.
     """
+    __slots__ = ()
+
     re = r'\)'
 
 
@@ -275,19 +377,21 @@ class RightRound(Symbol):
 class LeftSquare(Symbol):
     """Represents left square bracket.
     """
+    __slots__ = ()
+
     re = r'\['
 
     def parse(self, tokens):
         data = []
-        tok = tokens.advance(skip=NewLine)
+        tok = tokens.skip_newlines()
 
-        while tok.id != RightSquare.id:
+        while tok.tid != RightSquare.tid:
             value = tok.parse(tokens)
             data.append(value)
 
-            tok = tokens.advance((Comma, RightSquare))
-            if tok.id == Comma.id:
-                tok = tokens.advance(skip=NewLine)
+            tok = tokens.advance_in(_COMMA_OR_RIGHT_SQUARE)
+            if tok.tid == Comma.tid:
+                tok = tokens.skip_newlines()
 
         return data
 
@@ -296,6 +400,8 @@ class LeftSquare(Symbol):
 class RightSquare(Symbol):
     """Represents right square bracket.
     """
+    __slots__ = ()
+
     re = r'\]'
 
 
@@ -303,20 +409,22 @@ class RightSquare(Symbol):
 class LeftBrace(Symbol):
     """Represents left brace.
     """
+    __slots__ = ()
+
     re = r'{'
 
     def parse(self, tokens):
-        data = OrderedDict()
-        tok = tokens.advance(skip=NewLine)
+        data = ordered_dict()
+        tok = tokens.skip_newlines()
 
-        while tok.id != RightBrace.id:
+        while tok.tid != RightBrace.tid:
             key = tok.parse(tokens)
-            tokens.advance(Colon)
-            data[key] = tokens.advance().parse(tokens)
+            tokens.expect(Colon)
+            data[key] = tokens.next().parse(tokens)
 
-            tok = tokens.advance((Comma, RightBrace))
-            if tok.id == Comma.id:
-                tok = tokens.advance(skip=NewLine)
+            tok = tokens.advance_in(_COMMA_OR_RIGHT_BRACE)
+            if tok.tid == Comma.tid:
+                tok = tokens.skip_newlines()
 
         return data
 
@@ -325,6 +433,8 @@ class LeftBrace(Symbol):
 class RightBrace(Symbol):
     """Represents right brace.
     """
+    __slots__ = ()
+
     re = r'}'
 
 
@@ -332,6 +442,8 @@ class RightBrace(Symbol):
 class Comment(Token):
     """Represents comment token.
     """
+    __slots__ = ()
+
     re = r'\#.*'
     do = None  # ignore comments
 
@@ -340,62 +452,81 @@ class Comment(Token):
 class Indent(Token):
     """Represents indent token.
     """
+    __slots__ = ()
+
     re = r'^[\t\ ]+'
 
     def _parse_list(self, tokens):
         data = []
-        tok = tokens.advance()
+        tok = tokens.next()
 
-        while tok.id not in [Dedent.id, End.id]:
-            if tokens.peek().id == NewLine.id:
+        while tok.tid not in [Dedent.tid, End.tid]:
+            if tokens.peek().tid in [NewLine.tid, Dedent.tid, End.tid]:
                 value = None
             else:
-                tok = tokens.advance()
-                if tokens.peek().id == Colon.id:
-                    tokens.advance()
+                tok = tokens.next()
+                if tokens.peek().tid == Colon.tid:
+                    tokens.next()
                     key = tok.parse(tokens)
-                    tok = tokens.advance(skip=NewLine)
-                    value = {key: tok.parse(tokens)}
+                    tok = tokens.skip_newlines()
+                    if tok.tid in [Dedent.tid, End.tid]:
+                        # The block ends, so the key has no value.
+                        value = {key: None}
+                        tokens.push_back(tok)
+                    else:
+                        value = {key: tok.parse(tokens)}
                 else:
                     value = tok.parse(tokens)
             data.append(value)
 
-            tok = tokens.advance((End, NewLine, Dedent))
-            if tok.id == NewLine.id:
-                tok = tokens.advance((Hyphen, Dedent))
+            tok = tokens.advance_in(_END_NEW_LINE_OR_DEDENT)
+            if tok.tid == NewLine.tid:
+                tok = tokens.advance_in(_HYPHEN_OR_DEDENT)
 
+        self._close(tokens, tok)
         return data
 
     def _parse_dict(self, tokens, tok=None):
-        data = OrderedDict()
-        tok = tok or tokens.advance()
+        data = ordered_dict()
+        tok = tok or tokens.next()
 
-        while tok.id not in [Dedent.id, End.id]:
+        while tok.tid not in [Dedent.tid, End.tid]:
             key = tok.parse(tokens)
-            tokens.advance(Colon)
+            tokens.expect(Colon)
 
-            tok = tokens.advance()
-            if tok.id == NewLine.id:
-                tok = tokens.advance()
-                if tok.id not in [Indent.id, Dedent.id]:
+            tok = tokens.next()
+            if tok.tid == NewLine.tid:
+                tok = tokens.next()
+                if tok.tid != Indent.tid:
                     data[key] = None
                     continue
+            elif tok.tid in [Dedent.tid, End.tid]:
+                data[key] = None
+                continue
             data[key] = tok.parse(tokens)
 
-            tok = tokens.advance((End, NewLine, Dedent))
-            if tok.id == NewLine.id:
-                tok = tokens.advance(skip=NewLine)
+            tok = tokens.advance_in(_END_NEW_LINE_OR_DEDENT)
+            if tok.tid == NewLine.tid:
+                tok = tokens.skip_newlines()
 
+        self._close(tokens, tok)
         return data
 
+    def _close(self, tokens, tok):
+        # A single dedent token closes all the blocks it spans, so it is
+        # returned to the enclosing block with one level less.
+        if tok.tid == Dedent.tid and tok.value > 1:
+            tok.value -= 1
+            tokens.push_back(tok)
+
     def parse(self, tokens):
         peek = tokens.peek()
 
-        while peek.id == NewLine.id:
-            tokens.advance()
+        while peek.tid == NewLine.tid:
+            tokens.next()
             peek = tokens.peek()
 
-        if peek.id == Hyphen.id:
+        if peek.tid == Hyphen.tid:
             return self._parse_list(tokens)
         else:
             return self._parse_dict(tokens)
@@ -407,8 +538,11 @@ class Indent(Token):
 
 @token
 class Dedent(Token):
-    """Represents dedent token.
+    """Represents dedent token. Its value is the number of closed
+    indentation levels.
     """
+    __slots__ = ()
+
     re = None  # this token is generated after the scanning procedure
 
 
@@ -416,6 +550,8 @@ class Dedent(Token):
 class NewLine(Token):
     """Represents new line token.
     """
+    __slots__ = ()
+
     re = r'[\n]+'
 
     @classmethod
@@ -427,6 +563,8 @@ class NewLine(Token):
 class WhiteSpace(Token):
     """Represents comment token.
     """
+    __slots__ = ()
+
     re = r'[\t\ ]+'
     do = None  # ignore white-spaces
 
@@ -435,7 +573,9 @@ class WhiteSpace(Token):
 class Unknown(Token):
     """Represents unknown character sequence match.
     """
-    re = r'.*'
+    __slots__ = ()
+
+    re = r'.+'
 
     @classmethod
     def do(cls, scanner, token):
@@ -447,5 +587,17 @@ class Unknown(Token):
 class End(Token):
     """Represents EOL token.
     """
+    __slots__ = ()
+
     re = None
     name = 'end of file'
+
+
+#: Tokens allowed at certain places by the parsers above, precomputed
+#: for fast membership tests.
+_EQUAL_SIGN_COMMA_OR_RIGHT_ROUND = allowed(EqualSign, Comma, RightRound)
+_COMMA_OR_RIGHT_ROUND = allowed(Comma, RightRound)
+_COMMA_OR_RIGHT_SQUARE = allowed(Comma, RightSquare)
+_COMMA_OR_RIGHT_BRACE = allowed(Comma, RightBrace)
+_END_NEW_LINE_OR_DEDENT = allowed(End, NewLine, Dedent)
+_HYPHEN_OR_DEDENT = allowed(Hyphen, Dedent)
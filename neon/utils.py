@@ -4,32 +4,6 @@
 from __future__ import unicode_literals
 
 import re
-import itertools
-
-from ._compat import unicode
-
-
-class classproperty(object):
-    """Useful when class properties need to be defined."""
-
-    def __init__(self, fget):
-        self.fget = fget
-
-    def __get__(self, obj, cls=None):
-        if cls is None:
-            cls = type(obj)
-        return self.fget(cls)
-
-
-def lstripped(string):
-    """Number of potentially stripped characters on left.
-
-    :return: A string of characters that will be stripped
-        on the left side of the given string if the method
-        `strip()` is called on it.
-    :rtype: string
-    """
-    return ''.join(itertools.takewhile(unicode.isspace, string))
 
 
 def variants(*strings):
@@ -91,10 +65,16 @@ class peekable(object):
     # Lowercase to blend in with itertools. The fact that it's a class is an
     # implementation detail.
 
+    # The lookahead is kept in a single slot, which holds the ``_empty``
+    # sentinel when no item has been peeked yet.
+    __slots__ = ('_it', '_peek')
+
     _marker = object()
+    _empty = object()
 
     def __init__(self, iterable):
         self._it = iter(iterable)
+        self._peek = self._empty
 
     def __iter__(self):
         return self
@@ -106,12 +86,14 @@ class peekable(object):
             return False
         return True
 
+    __bool__ = __nonzero__
+
     def peek(self, default=_marker):
         """Return the item that will be next returned from ``next()``.
         Return ``default`` if there are no items left. If ``default`` is not
         provided, raise ``StopIteration``.
         """
-        if not hasattr(self, '_peek'):
+        if self._peek is self._empty:
             try:
                 self._peek = next(self._it)
             except StopIteration:
@@ -121,6 +103,10 @@ class peekable(object):
         return self._peek
 
     def next(self):
-        ret = self.peek()
-        del self._peek
+        ret = self._peek
+        if ret is self._empty:
+            ret = self.peek()
+        self._peek = self._empty
         return ret
+
+    __next__ = next
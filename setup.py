@@ -2,7 +2,7 @@
 
 
 import re
-from setuptools import setup, find_packages
+from setuptools import setup, find_packages, Extension
 
 
 # determine version and the author
@@ -11,6 +11,20 @@ version = re.search(r'__version__ = \'([^\']*)\'', code).group(1)
 author = re.search(r'__author__ = \'([^\']*)\'', code).group(1)
 
 
+# if Cython is available, the tokenizer and parser modules are compiled
+# to C extensions, otherwise (or if the compilation fails) the pure Python
+# modules are used
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    ext_modules = []
+else:
+    ext_modules = cythonize([
+        Extension('neon.' + name, ['neon/{}.py'.format(name)], optional=True)
+        for name in ('decoder', 'tokens', 'utils')
+    ], compiler_directives={'language_level': '3str'})
+
+
 setup(
     name='neon-py',
     version=version,
@@ -22,6 +36,7 @@ setup(
     url='https://github.com/paveldedik/neon-py',
     license=open('LICENSE').read(),
     packages=find_packages(exclude=['tests']),
+    ext_modules=ext_modules,
     install_requires=['python-dateutil'],
     include_package_data=True,
     zip_safe=False,
@@ -77,6 +77,41 @@ def test_data_structures():
     assert neon.decode(NEON_DATA_STRUCTURES) == expected
 
 
+NEON_NESTED_BLOCKS = """
+a:
+    b:
+        c:
+            - d
+        e:
+f:
+    - g:
+        h: i
+j:
+    k:
+"""
+
+# Items and keys without a value at the end of blocks.
+NEON_NESTED_BLOCKS_EMPTY = [
+    ('a:\n  - x\n  -', {'a': ['x', None]}),
+    ('a:\n  -', {'a': [None]}),
+    ('k0:\n    - {a: 1}\n    - \n\n  \n', {'k0': [{'a': 1}, None]}),
+    ('k0:\n    k0:\n        - k0: \nk1: "q"\n',
+     {'k0': {'k0': [{'k0': None}]}, 'k1': 'q'}),
+]
+
+
+def test_nested_blocks():
+    expected = {
+        'a': {'b': {'c': ['d'], 'e': None}},
+        'f': [{'g': {'h': 'i'}}],
+        'j': {'k': None},
+    }
+    assert neon.decode(NEON_NESTED_BLOCKS) == expected
+
+    for neon_string, expected in NEON_NESTED_BLOCKS_EMPTY:
+        assert neon.decode(neon_string) == expected
+
+
 NEON_EMPTY_DATA_STRUCTURES = """
 - {}
 - []
@@ -88,3 +123,38 @@ NEON_EMPTY_DATA_STRUCTURES = """
 def test_empty_data_structures():
     expected = [{}, [], {}, neon.entity.Entity('Tree', {})]
     assert neon.decode(NEON_EMPTY_DATA_STRUCTURES) == expected
+
+
+# Blank lines and comment lines do not affect indentation, whatever
+# whitespace they contain.
+NEON_BLANK_LINE_INDENT = 'k0:\n   \n\tk0: 2.5'
+
+NEON_COMMENT_INDENT = """
+a:
+    b: 1
+  # comment at a lower indent
+# comment at no indent
+    c: 2
+"""
+
+
+def test_blank_and_comment_lines_indent():
+    expected = {'k0': {'k0': 2.5}}
+    assert neon.decode(NEON_BLANK_LINE_INDENT) == expected
+
+    expected = {'a': {'b': 1, 'c': 2}}
+    assert neon.decode(NEON_COMMENT_INDENT) == expected
+
+
+# Blocks closed by the end of the input, without a trailing new line.
+NEON_BLOCKS_AT_END = [
+    ('a:\n  -', {'a': [None]}),
+    ('a:\n  b:', {'a': {'b': None}}),
+    ('a:\n  b:\n    - c', {'a': {'b': ['c']}}),
+    ('a:\n  - b:\n      c: d', {'a': [{'b': {'c': 'd'}}]}),
+]
+
+
+def test_blocks_at_end():
+    for neon_string, expected in NEON_BLOCKS_AT_END:
+        assert neon.decode(neon_string) == expected
@@ -3,7 +3,14 @@
 
 from __future__ import unicode_literals
 
+import io
+
+import pytest
+
 import neon
+from neon import _compat
+from neon.decoder import SCANNER_FLAGS
+from neon.tokens import Literal
 
 
 NEON_DECODE_SAMPLE = """
@@ -47,6 +54,24 @@ def test_decode_sample():
     assert neon.decode(NEON_DECODE_SAMPLE)
 
 
+def test_decode_stream():
+    expected = neon.decode(NEON_DECODE_SAMPLE)
+    assert neon.decode(io.StringIO(NEON_DECODE_SAMPLE)) == expected
+    for chunk_size in [1, 7, 64]:
+        stream = io.StringIO(NEON_DECODE_SAMPLE)
+        assert neon.decoder.parse_stream(stream, chunk_size) == expected
+
+
+def test_decode_stream_long_line():
+    items = list(range(2000))
+    neon_string = 'items: [{}]\nlast: 1\n'.format(
+        ', '.join(str(item) for item in items))
+    expected = {'items': items, 'last': 1}
+    for chunk_size in [1, 5, 64]:
+        stream = io.StringIO(neon_string)
+        assert neon.decoder.parse_stream(stream, chunk_size) == expected
+
+
 NEON_UTF8_SUPPORT = """
 - ěšíčťľĺ
 - 5 × 6 ÷ 7 ± ∞ - π
@@ -56,3 +81,22 @@ NEON_UTF8_SUPPORT = """
 def test_utf8_support():
     expected = ['ěšíčťľĺ', '5 × 6 ÷ 7 ± ∞ - π']
     assert neon.decode(NEON_UTF8_SUPPORT) == expected
+
+
+LITERAL_SAMPLES = [
+    'a', 'abc', 'Homer Simpson', '742 Evergreen Terrace', 'a:b', 'a::b',
+    'http://example.com', '-1.5', 'a,b', 'a: b', 'a b c # comment',
+    'a  b\t c', 'Tree(x)', 'a]', 'x:\n',
+]
+
+
+@pytest.mark.skipif(_compat.ATOMIC_GROUP != '(?>',
+                    reason='atomic groups are not supported')
+def test_literal_atomic_group():
+    atomic = _compat.re.compile(Literal.re, SCANNER_FLAGS)
+    plain = _compat.re.compile(Literal.re.replace('(?>', '(?:'),
+                               SCANNER_FLAGS)
+    for sample in LITERAL_SAMPLES:
+        expected = plain.match(sample)
+        result = atomic.match(sample)
+        assert (result and result.group()) == (expected and expected.group())
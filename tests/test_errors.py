@@ -40,6 +40,23 @@ def test_bad_indent():
     assert str(excinfo.value) == NEON_BAD_INDENT_MSG
 
 
+NEON_BAD_INDENT_AFTER_COMMENTS = """
+a:
+  # comment
+
+  - b
+    # comment
+   - c
+"""
+NEON_BAD_INDENT_AFTER_COMMENTS_MSG = "Unexpected indent on line 7."
+
+
+def test_bad_indent_after_comments():
+    with pytest.raises(errors.ParserError) as excinfo:
+        neon.decode(NEON_BAD_INDENT_AFTER_COMMENTS)
+    assert str(excinfo.value) == NEON_BAD_INDENT_AFTER_COMMENTS_MSG
+
+
 NEON_UNEXPECTED_END = 'a: ['
 NEON_UNEXPECTED_END_MSG = "Unexpected end of file, expected ',' or ']'."
 
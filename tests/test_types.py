@@ -6,7 +6,10 @@ from __future__ import unicode_literals
 from dateutil.tz import tz
 from datetime import datetime
 
+import pytest
+
 import neon
+from neon.tokens import Literal
 
 
 NEON_ENTITY = """
@@ -47,6 +50,32 @@ def test_types():
         assert result[key] == expected[key]
 
 
+NEON_NON_NUMBERS = """
+month: March
+day: Jan 5
+inf: inf
+neginf: -inf
+posinf: +inf
+nan: nan
+infinity: Infinity
+huge: 1e999
+"""
+
+
+def test_non_numbers():
+    expected = {
+        'month': 'March',
+        'day': 'Jan 5',
+        'inf': 'inf',
+        'neginf': '-inf',
+        'posinf': '+inf',
+        'nan': 'nan',
+        'infinity': 'Infinity',
+        'huge': '1e999',
+    }
+    assert neon.decode(NEON_NON_NUMBERS) == expected
+
+
 NEON_DATETIME = """
 - 2013-04-23 13:24:55.123456+0000
 - 2015-01-20
@@ -59,3 +88,33 @@ def test_datetime():
                 datetime(2015, 1, 20),
                 datetime(2015, 5, 10)]
     assert neon.decode(NEON_DATETIME) == expected
+
+
+NEON_REPEATED_LITERALS = """
+- {key: 12, other: 1.5, flag: yes, date: 2015-01-20, text: word}
+- {key: 12, other: 1.5, flag: yes, date: 2015-01-20, text: word}
+"""
+
+
+def test_repeated_literals():
+    expected = {
+        'key': 12,
+        'other': 1.5,
+        'flag': True,
+        'date': datetime(2015, 1, 20),
+        'text': 'word',
+    }
+    first, second = neon.decode(NEON_REPEATED_LITERALS)
+    assert first == second == expected
+    for key in expected:
+        assert type(first[key]) is type(second[key]) is type(expected[key])
+
+
+@pytest.mark.skipif(not hasattr(Literal.convert, 'cache_info'),
+                    reason='literals are not cached')
+def test_literal_cache():
+    cache_info = Literal.convert.cache_info
+    neon.decode('cached_key: cached_value')
+    hits = cache_info().hits
+    neon.decode('cached_key: cached_value')
+    assert cache_info().hits == hits + 2